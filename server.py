@@ -14,18 +14,18 @@ Usage:
 Data flows
 ----------
 PROPFIND (list directory):
-    EagleProvider.get_resource_inst(path)
-    → _dav_to_eagle(path) → Path("folder/name")
-    → source.path_to_id lookup → folder_id_map → EagleFolderResource
-    → wsgidav calls get_member_names()
-        → FolderSource.files.keys() + FolderSource.subfolders.keys()
-    → wsgidav calls get_member(name) for each child
-        → get_resource_inst("folder/name/child") → EagleFile/FolderResource
+    MultiLibraryProvider.get_resource_inst(path)
+    → _dav_to_eagle(path) → "folder/name"
+    → _resource_for(): source.path_to_id lookup → folder_id_map → EagleFolderResource
+    → wsgidav calls get_member_list()
+        → one EagleFile/FolderResource per FolderSource.files / .subfolders entry,
+          built directly from the folder's dicts (no per-child provider lookup)
 
 GET (download file):
     get_resource_inst → EagleFileResource
     → get_content_length() → image.meta.size
-    → get_content() → BytesIO(ImageSource.read_data())
+    → get_content() → ImageSource.open_data() (pread on a shared descriptor on POSIX,
+      a per-request file object elsewhere)
         → reads library/images/{id}/{name}.{ext} from disk
 
 PUT new file:
@@ -67,33 +67,177 @@ MOVE / RENAME:
 """
 
 import logging
+import os
 import sys
+import threading
+from collections import OrderedDict
+from functools import cache, cached_property, lru_cache
 from io import BytesIO
 from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import TYPE_CHECKING, BinaryIO
+from urllib.parse import quote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
 
 from wsgidav import util
 from wsgidav.wsgidav_app import WsgiDAVApp
 from wsgidav.dav_error import DAVError, HTTP_FORBIDDEN, HTTP_INTERNAL_ERROR
 from wsgidav.dav_provider import DAVCollection, DAVNonCollection, DAVProvider
 from wsgidav.dc.simple_dc import SimpleDomainController
+from wsgidav.default_conf import DEFAULT_CONFIG
+from wsgidav.mw.base_mw import BaseMiddleware
 
+from src.core import join_path
 from src.source import EagleLibrarySource
+from src.type import VPath  # noqa: TC001
+
+if TYPE_CHECKING:
+    from src.library import FolderSource, ImageSource
 
 logger = logging.getLogger(__name__)
 
+LIBRARY_SUFFIX = ".library"
+
 
 # ---------------------------------------------------------------------------
 # Path helpers
 # ---------------------------------------------------------------------------
 
-def _dav_to_eagle(dav_path: str) -> Path:
-    """Convert a DAV path string to an Eagle virtual Path.
+def _dav_to_eagle(dav_path: str) -> VPath:
+    """Convert a DAV path string to an Eagle virtual path.
+
+    "/未分类/image.png" → "未分类/image.png"
+    "/"                 → ""   (root)
+    """
+    return dav_path.strip("/")
+
+
+# Same unescaped characters as DAVResource.get_href, which keeps Nautilus happy.
+_HREF_SAFE = "/!*'(),$-_|."
+
+
+@lru_cache(maxsize=8192)
+def _quote_name(name: str) -> str:
+    """Percent-encode one path segment for an href.
 
-    "/未分类/image.png" → Path("未分类/image.png")
-    "/"                 → Path()   (root)
+    get_href re-encodes and quotes the whole path of every member on each
+    listing; names repeat across listings, so quoting them once is enough.
     """
-    stripped = dav_path.strip("/")
-    return Path(stripped) if stripped else Path()
+    return quote(name, safe=_HREF_SAFE)
+
+
+@cache
+def _mime_type(ext: str) -> str:
+    """Guess the MIME type for a file extension.
+
+    A library only uses a handful of extensions, so the mimetypes lookup is
+    done once per extension instead of once per file in every PROPFIND.
+    """
+    return util.guess_mime_type(f"file.{ext}") or "application/octet-stream"
+
+
+# ---------------------------------------------------------------------------
+# Live property cache
+# ---------------------------------------------------------------------------
+
+class _PropCache:
+    """LRU cache of formatted live properties for file and folder resources.
+
+    A PROPFIND asks every child for its dates, length, type and etag, and
+    wsgidav formats the dates anew each time.  Entries are keyed by the
+    fields every mutation bumps (modificationTime, mtime, size, ext), so a
+    changed node simply misses and no explicit invalidation is needed.
+    """
+
+    FILE_PROPS = frozenset({
+        "{DAV:}creationdate",
+        "{DAV:}getlastmodified",
+        "{DAV:}getcontentlength",
+        "{DAV:}getcontenttype",
+        "{DAV:}getetag",
+    })
+    FOLDER_PROPS = frozenset({
+        "{DAV:}creationdate",
+        "{DAV:}getlastmodified",
+    })
+
+    def __init__(self, maxsize: int = 4096):
+        self._maxsize = maxsize
+        self._data: OrderedDict[tuple, dict[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: tuple) -> dict[str, str] | None:
+        with self._lock:
+            props = self._data.get(key)
+            if props is not None:
+                self._data.move_to_end(key)
+            return props
+
+    def _store(self, key: tuple, props: dict[str, str]) -> dict[str, str]:
+        with self._lock:
+            self._data[key] = props
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+        return props
+
+    def file(self, image: "ImageSource") -> dict[str, str]:
+        meta = image.meta
+        key = (meta.id, meta.modificationTime, meta.mtime, meta.size, meta.ext)
+        if (props := self._lookup(key)) is not None:
+            return props
+        return self._store(key, {
+            "{DAV:}creationdate": util.get_rfc3339_time(meta.btime / 1000.0),
+            "{DAV:}getlastmodified": util.get_rfc1123_time(meta.mtime / 1000.0),
+            "{DAV:}getcontentlength": str(meta.size),
+            "{DAV:}getcontenttype": _mime_type(meta.ext),
+            "{DAV:}getetag": str(meta.modificationTime),
+        })
+
+    def folder(self, folder: "FolderSource") -> dict[str, str]:
+        meta = folder.meta
+        # Folders have no mtime of their own; both dates come from modificationTime.
+        key = (meta.id, meta.modificationTime)
+        if (props := self._lookup(key)) is not None:
+            return props
+        seconds = meta.modificationTime / 1000.0
+        return self._store(key, {
+            "{DAV:}creationdate": util.get_rfc3339_time(seconds),
+            "{DAV:}getlastmodified": util.get_rfc1123_time(seconds),
+        })
+
+
+_props = _PropCache()
+
+
+class _MissCache:
+    """LRU cache of DAV paths that recently resolved to nothing.
+
+    Clients probe for desktop.ini, .DS_Store, ._* and the like on every
+    listing; without this each probe walks the path maps again.  A miss is
+    stored with the library's generation at the time and is trusted only
+    while the generation is unchanged, so any write or external change to
+    the library drops every cached miss at once.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._maxsize = maxsize
+        self._data: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: tuple[str, int]) -> bool:
+        path, generation = key
+        with self._lock:
+            if self._data.get(path) != generation:
+                return False
+            self._data.move_to_end(path)
+            return True
+
+    def add(self, path: str, generation: int) -> None:
+        with self._lock:
+            self._data[path] = generation
+            self._data.move_to_end(path)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
 
 
 # ---------------------------------------------------------------------------
@@ -135,15 +279,24 @@ class EagleFileResource(DAVNonCollection):
     EagleLibrarySource caches.
     """
 
-    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: Path, dav_prefix: str = ""):
+    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: VPath, dav_prefix: str = "",
+                 *, image: "ImageSource | None" = None, href: str | None = None):
         super().__init__(path, environ)
         self._src = source
         self._ep = eagle_path
         self._dav_prefix = dav_prefix
+        self._href = href
+        if image is not None:
+            # Parent listing already holds the ImageSource; skip the cache lookup.
+            self._image = image
 
-    @property
+    @cached_property
     def _image(self):
-        """Look up the live ImageSource from the source caches."""
+        """Look up the live ImageSource from the source caches.
+
+        Memoized per instance: wsgidav queries length, dates, etag and content
+        separately for one request, and this resource lives only that long.
+        """
         try:
             return self._src.file_id_map[self._src.path_to_id[self._ep]]
         except KeyError:
@@ -155,7 +308,7 @@ class EagleFileResource(DAVNonCollection):
         return self._image.meta.size
 
     def get_content_type(self) -> str:
-        return util.guess_mime_type(self.path) or "application/octet-stream"
+        return _mime_type(self._image.meta.ext)
 
     def get_last_modified(self) -> float:
         """Return mtime in seconds (wsgidav expects a Unix timestamp float)."""
@@ -170,12 +323,34 @@ class EagleFileResource(DAVNonCollection):
     def support_etag(self) -> bool:
         return True
 
-    def get_content(self) -> BytesIO:
-        return BytesIO(self._image.read_data())
+    def support_ranges(self) -> bool:
+        """Serve Range requests by seeking, instead of resending the whole file."""
+        return True
+
+    def get_content(self) -> BinaryIO:
+        """Stream the file from disk; wsgidav reads it in blocks and closes it."""
+        return self._image.open_data()
+
+    def get_href(self) -> str:
+        return self._href or super().get_href()
+
+    @cached_property
+    def _live_props(self) -> dict[str, str]:
+        """Formatted live properties, taken from the shared cache once per resource.
+
+        PROPFIND asks for each property separately; without this every one of
+        them would rebuild the key and take the cache lock again.
+        """
+        return _props.file(self._image)
+
+    def get_property_value(self, name: str):
+        if name in _PropCache.FILE_PROPS:
+            return self._live_props[name]
+        return super().get_property_value(name)
 
     # ---- Write support ----
 
-    def begin_write(self, _content_type=None) -> _WriteBuffer:
+    def begin_write(self, *, content_type=None) -> _WriteBuffer:
         """Return a buffer that commits to Eagle on close (overwrite existing file)."""
         ep = self._ep
 
@@ -212,10 +387,11 @@ class EaglePendingResource(DAVNonCollection):
     call source.new_file() to actually create the Eagle asset.
     """
 
-    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: Path):
+    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: VPath):
         super().__init__(path, environ)
         self._src = source
         self._ep = eagle_path
+        self._image: ImageSource | None = None
 
     def get_content_length(self) -> int:
         return 0
@@ -227,16 +403,19 @@ class EaglePendingResource(DAVNonCollection):
         return BytesIO(b"")
 
     def get_etag(self):
-        return None
+        return None if self._image is None else str(self._image.meta.modificationTime)
 
     def support_etag(self) -> bool:
-        return False
+        # Once written, the PUT response carries the new asset's ETag, sparing
+        # clients a follow-up HEAD/PROPFIND just to learn it.
+        return self._image is not None
 
-    def begin_write(self, _content_type=None) -> _WriteBuffer:
+    def begin_write(self, *, content_type=None) -> _WriteBuffer:
         ep = self._ep
 
         def _on_close(data: bytes):
-            if not self._src.new_file(ep, data):
+            self._image = self._src.new_file(ep, data)
+            if self._image is None:
                 raise DAVError(HTTP_INTERNAL_ERROR, f"new_file failed for {ep}")
 
         return _WriteBuffer(_on_close)
@@ -249,14 +428,20 @@ class EaglePendingResource(DAVNonCollection):
 class EagleFolderResource(DAVCollection):
     """WebDAV collection backed by an Eagle FolderSource."""
 
-    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: Path, dav_prefix: str = ""):
+    def __init__(self, path: str, environ: dict, source: EagleLibrarySource, eagle_path: VPath, dav_prefix: str = "",
+                 *, folder: "FolderSource | None" = None, href: str | None = None):
         super().__init__(path, environ)
         self._src = source
         self._ep = eagle_path
         self._dav_prefix = dav_prefix
+        self._href = href
+        if folder is not None:
+            # Parent listing already holds the FolderSource; skip the cache lookup.
+            self._folder = folder
 
-    @property
+    @cached_property
     def _folder(self):
+        """Look up the live FolderSource from the source caches (memoized per request)."""
         try:
             return self._src.folder_id_map[self._src.path_to_id[self._ep]]
         except KeyError:
@@ -268,29 +453,91 @@ class EagleFolderResource(DAVCollection):
     def get_creation_date(self) -> float:
         return self._folder.meta.modificationTime / 1000.0
 
+    def get_href(self) -> str:
+        return self._href or super().get_href()
+
+    @cached_property
+    def _live_props(self) -> dict[str, str]:
+        """Formatted live properties, taken from the shared cache once per resource."""
+        return _props.folder(self._folder)
+
+    def get_property_value(self, name: str):
+        if name in _PropCache.FOLDER_PROPS:
+            return self._live_props[name]
+        return super().get_property_value(name)
+
     # ---- Required DAVCollection interface ----
 
     def get_member_names(self) -> list[str]:
         """Return names of all direct children (files + subfolders)."""
-        f = self._folder
-        return list(f.files.keys()) + list(f.subfolders.keys())
+        files, subfolders = self._src.list_folder(self._folder)
+        return [name for name, _ in files] + [name for name, _ in subfolders]
 
     def get_member(self, name: str):
-        """Delegate to the provider so path mapping stays centralised."""
+        """Resolve a direct child from this folder's own dicts.
+
+        A single get() per dict, so a concurrent delete cannot slip in between
+        a membership test and the lookup.
+        """
+        f = self._folder
+        if (image := f.files.get(name)) is not None:
+            return self._file_member(name, image)
+        if (sub := f.subfolders.get(name)) is not None:
+            return self._folder_member(name, sub)
+        return None
+
+    def get_member_list(self) -> list:
+        """Build all child resources in one pass over the folder (Depth: 1 PROPFIND).
+
+        Going through the provider would re-run update_cache and re-parse the
+        path for every entry of a possibly large directory.  The shared parts
+        of each child's constructor arguments are hoisted out of the loops,
+        and each href is this folder's quoted href plus the cached quoted name.
+        Other request threads may be mutating the folder, so the children are
+        iterated from a copy taken under the source lock.
+        """
+        files, subfolders = self._src.list_folder(self._folder)
+        base = self.path.rstrip("/") + "/"
+        environ, src, ep, prefix = self.environ, self._src, self._ep, self._dav_prefix
+        provider = self.provider
+        href = quote(provider.mount_path + provider.share_path + base, safe=_HREF_SAFE)
+        members: list = [
+            EagleFileResource(base + name, environ, src, join_path(ep, name), prefix,
+                              image=image, href=href + _quote_name(name))
+            for name, image in files
+        ]
+        members.extend(
+            EagleFolderResource(base + name, environ, src, sub.target, prefix,
+                                folder=sub, href=href + _quote_name(name) + "/")
+            for name, sub in subfolders
+        )
+        return members
+
+    def _file_member(self, name: str, image: "ImageSource") -> EagleFileResource:
+        child_dav = self.path.rstrip("/") + "/" + name
+        return EagleFileResource(
+            child_dav, self.environ, self._src, join_path(self._ep, name), self._dav_prefix,
+            image=image,
+        )
+
+    def _folder_member(self, name: str, folder: "FolderSource") -> "EagleFolderResource":
         child_dav = self.path.rstrip("/") + "/" + name
-        return self.provider.get_resource_inst(child_dav, self.environ)
+        return EagleFolderResource(
+            child_dav, self.environ, self._src, join_path(self._ep, name), self._dav_prefix,
+            folder=folder,
+        )
 
     # ---- Write support ----
 
     def create_empty_resource(self, name: str) -> EaglePendingResource:
         """Called by wsgidav before a PUT to a new (non-existing) child path."""
-        child_ep = self._ep / name
+        child_ep = join_path(self._ep, name)
         child_dav = self.path.rstrip("/") + "/" + name
         return EaglePendingResource(child_dav, self.environ, self._src, child_ep)
 
     def create_collection(self, name: str) -> None:
         """MKCOL handler."""
-        if not self._src.new_folder(self._ep / name):
+        if self._src.new_folder(join_path(self._ep, name)) is None:
             raise DAVError(HTTP_FORBIDDEN, f"Cannot create folder '{name}' here")
 
     # ---- Delete / Move ----
@@ -302,6 +549,24 @@ class EagleFolderResource(DAVCollection):
     def support_recursive_delete(self) -> bool:
         return True
 
+    def handle_delete(self) -> bool:
+        """Delete the whole subtree without building a resource per descendant.
+
+        wsgidav's generic DELETE first materialises every descendant only to
+        check each one for locks; a single depth-infinity check on this URL
+        covers the same locks, and delete_node recurses over the source itself.
+        """
+        lock_man = self.provider.lock_manager
+        if lock_man is not None:
+            lock_man.check_write_permission(
+                url=self.get_ref_url(),
+                depth="infinity",
+                token_list=self.environ["wsgidav.ifLockTokenList"],
+                principal=self.environ["wsgidav.user_name"],
+            )
+        self.delete()
+        return True
+
     def support_recursive_move(self, _dest_path: str) -> bool:
         return True
 
@@ -317,18 +582,30 @@ class EagleFolderResource(DAVCollection):
 # ---------------------------------------------------------------------------
 
 class LibraryListResource(DAVCollection):
-    """Virtual root collection that lists all loaded Eagle libraries as subfolders."""
+    """Virtual root collection that lists all Eagle libraries as subfolders."""
 
     def __init__(self, path: str, environ: dict, provider: "MultiLibraryProvider"):
         super().__init__(path, environ)
         self._provider = provider
 
     def get_member_names(self) -> list[str]:
-        return list(self._provider._sources.keys())
+        return list(self._provider._library_paths.keys())
 
     def get_member(self, name: str):
+        if name not in self._provider._library_paths:
+            return None
+        return self._library_member(name)
+
+    def get_member_list(self) -> list:
+        """Build one resource per library directly (Depth: 1 PROPFIND on /)."""
+        return [self._library_member(name) for name in self._provider._library_paths]
+
+    def _library_member(self, name: str):
         child_dav = self.path.rstrip("/") + "/" + name + "/"
-        return self._provider.get_resource_inst(child_dav, self.environ)
+        src = self._provider._sources.get(name)
+        if src is None:
+            return UnloadedLibraryResource(child_dav, self.environ, self._provider, name)
+        return _resource_for(child_dav, self.environ, src, "", "/" + name)
 
     def create_empty_resource(self, name: str):
         raise DAVError(HTTP_FORBIDDEN, "Cannot create files in root")
@@ -337,6 +614,63 @@ class LibraryListResource(DAVCollection):
         raise DAVError(HTTP_FORBIDDEN, "Cannot create folders in root")
 
 
+class UnloadedLibraryResource(DAVCollection):
+    """Stand-in for a library that has not been loaded yet.
+
+    Lets a root listing report every library (dates come from a stat of its
+    metadata.json) without paying each one's full image scan.  Anything that
+    looks inside the library goes through the provider, which loads it.
+    """
+
+    def __init__(self, path: str, environ: dict, provider: "MultiLibraryProvider", name: str):
+        super().__init__(path, environ)
+        self._provider = provider
+        self._name = name
+
+    @cached_property
+    def _loaded(self) -> "EagleFolderResource":
+        res = self._provider.get_resource_inst(self.path, self.environ)
+        if res is None:
+            raise DAVError(HTTP_INTERNAL_ERROR, f"Library failed to load: {self._name}")
+        return res
+
+    def get_last_modified(self) -> float:
+        return (self._provider._library_paths[self._name] / "metadata.json").stat().st_mtime
+
+    def get_creation_date(self) -> float:
+        return self.get_last_modified()
+
+    def get_member_names(self) -> list[str]:
+        return self._loaded.get_member_names()
+
+    def get_member(self, name: str):
+        return self._loaded.get_member(name)
+
+    def get_member_list(self) -> list:
+        return self._loaded.get_member_list()
+
+
+# ---------------------------------------------------------------------------
+# Resource lookup (shared by both providers)
+# ---------------------------------------------------------------------------
+
+def _resource_for(path: str, environ: dict, src: EagleLibrarySource,
+                  ep: VPath, dav_prefix: str = ""):
+    """Return the resource for Eagle path *ep* in *src*, or None if absent."""
+    _id = src.path_to_id.get(ep)
+    if _id is None:
+        return None
+
+    # Hand the node we just found to the resource so it does not look it up again.
+    if (folder := src.folder_id_map.get(_id)) is not None:
+        return EagleFolderResource(path, environ, src, ep, dav_prefix, folder=folder)
+
+    if (image := src.file_id_map.get(_id)) is not None:
+        return EagleFileResource(path, environ, src, ep, dav_prefix, image=image)
+
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Multi-library provider
 # ---------------------------------------------------------------------------
@@ -345,51 +679,69 @@ class MultiLibraryProvider(DAVProvider):
     """wsgidav DAVProvider that exposes multiple Eagle libraries under one share.
 
     Each *.library folder in *root_path* is mounted as a top-level subfolder
-    named after the library stem (e.g. ``/绘画参考/``).
+    named after the library stem (e.g. ``/绘画参考/``).  Libraries are only
+    scanned on first access, so startup cost does not grow with the number
+    of images in libraries nobody opens.
     """
 
     def __init__(self, root_path: Path):
         super().__init__()
+        # One scandir pass; names are cut with a slice instead of Path.stem/suffix.
+        with os.scandir(root_path) as it:
+            self._library_paths: dict[str, Path] = {
+                entry.name[: -len(LIBRARY_SUFFIX)]: root_path / entry.name
+                for entry in sorted(it, key=lambda e: e.name)
+                if entry.name.endswith(LIBRARY_SUFFIX) and entry.is_dir()
+            }
         self._sources: dict[str, EagleLibrarySource] = {}
-        for lib_dir in sorted(root_path.glob("*.library")):
-            name = lib_dir.stem
-            logger.info("Loading library: %s", lib_dir)
-            self._sources[name] = EagleLibrarySource(lib_dir)
-        logger.info(
-            "Loaded %d libraries, total %d folders, %d files",
-            len(self._sources),
-            sum(len(s.folder_id_map) for s in self._sources.values()),
-            sum(len(s.file_id_map) for s in self._sources.values()),
-        )
+        self._load_lock = threading.Lock()
+        self._misses = _MissCache()
+        logger.info("Found %d libraries, loading on first access", len(self._library_paths))
+
+    def _get_source(self, name: str) -> EagleLibrarySource | None:
+        """Return the library's source, loading it on first use."""
+        src = self._sources.get(name)
+        if src is not None:
+            return src
+        lib_dir = self._library_paths.get(name)
+        if lib_dir is None:
+            return None
+        with self._load_lock:
+            # Another request may have loaded it while we waited for the lock.
+            src = self._sources.get(name)
+            if src is None:
+                logger.info("Loading library: %s", lib_dir)
+                src = EagleLibrarySource(lib_dir)
+                self._sources[name] = src
+                logger.info(
+                    "Library %s loaded — %d folders, %d files",
+                    name,
+                    len(src.folder_id_map),
+                    len(src.file_id_map),
+                )
+        return src
 
     def get_resource_inst(self, path: str, environ: dict):
         """Route requests to the appropriate EagleLibrarySource."""
         if path in ("/", ""):
             return LibraryListResource("/", environ, self)
 
-        parts = path.strip("/").split("/", 1)
-        lib_name = parts[0]
-        if lib_name not in self._sources:
+        # partition splits off the library name without building a list or
+        # re-prefixing the remainder with "/" just to strip it again.
+        lib_name, _, inner = path.strip("/").partition("/")
+        src = self._get_source(lib_name)
+        if src is None:
             return None
 
-        src = self._sources[lib_name]
         src.update_cache()
-
-        inner = "/" + parts[1] if len(parts) > 1 else "/"
-        ep = _dav_to_eagle(inner)
-        dav_prefix = "/" + lib_name
-
-        _id = src.path_to_id.get(ep)
-        if _id is None:
+        generation = src.generation
+        if (path, generation) in self._misses:
             return None
 
-        if _id in src.folder_id_map:
-            return EagleFolderResource(path, environ, src, ep, dav_prefix)
-
-        if _id in src.file_id_map:
-            return EagleFileResource(path, environ, src, ep, dav_prefix)
-
-        return None
+        res = _resource_for(path, environ, src, _dav_to_eagle(inner), "/" + lib_name)
+        if res is None:
+            self._misses.add(path, generation)
+        return res
 
 
 # ---------------------------------------------------------------------------
@@ -415,25 +767,62 @@ class EagleProvider(DAVProvider):
         Called by wsgidav for every incoming request.
         """
         self._src.update_cache()
-        ep = _dav_to_eagle(path)
+        return _resource_for(path, environ, self._src, _dav_to_eagle(path))
 
-        if ep not in self._src.path_to_id:
-            return None
 
-        _id = self._src.path_to_id[ep]
+# ---------------------------------------------------------------------------
+# App factory + entry point
+# ---------------------------------------------------------------------------
 
-        if _id in self._src.folder_id_map:
-            return EagleFolderResource(path, environ, self._src, ep)
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """wsgiref server that handles each request in its own thread.
 
-        if _id in self._src.file_id_map:
-            return EagleFileResource(path, environ, self._src, ep)
+    The stock WSGIServer serves one request at a time, so a single slow GET
+    (large video) or PUT (thumbnail generation) stalls every other client.
+    EagleLibrarySource serialises its own mutations, so handlers may overlap.
+    """
 
-        return None
+    daemon_threads = True
 
 
-# ---------------------------------------------------------------------------
-# App factory + entry point
-# ---------------------------------------------------------------------------
+class CacheControl(BaseMiddleware):
+    """Let clients reuse GET/PROPFIND responses for a short while.
+
+    Libraries are read-mostly, so clients may serve repeated listings and
+    downloads from their own cache for CACHE_MAX_AGE seconds.  After that
+    they revalidate with the ETag / Last-Modified validators wsgidav already
+    sends.
+    """
+
+    CACHE_MAX_AGE = 120
+    CACHEABLE_METHODS = frozenset({"GET", "HEAD", "PROPFIND"})
+
+    def __call__(self, environ, start_response):
+        if environ["REQUEST_METHOD"] not in self.CACHEABLE_METHODS:
+            return self.next_app(environ, start_response)
+
+        def _start_response(status, headers, exc_info=None):
+            if status[:3] in ("200", "207") and not any(
+                k.lower() == "cache-control" for k, _ in headers
+            ):
+                headers.append(("Cache-Control", f"private, max-age={self.CACHE_MAX_AGE}"))
+            return start_response(status, headers, exc_info)
+
+        return self.next_app(environ, _start_response)
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    """wsgiref handler that skips the per-request access log line.
+
+    The stock handler formats and writes one line to stderr for every
+    request, synchronously on the handler thread.  A PROPFIND-heavy client
+    produces thousands of them.  Run with --verbose 3 to get wsgidav's own
+    per-request log instead.
+    """
+
+    def log_request(self, code="-", size="-"):
+        pass
+
 
 def make_app(root_path: Path, verbose: int = 1,
              username: str = "eagle", password: str = "eagle") -> WsgiDAVApp:
@@ -444,6 +833,15 @@ def make_app(root_path: Path, verbose: int = 1,
     """
     config = {
         "provider_mapping": {"/": MultiLibraryProvider(root_path)},
+        # PUT bodies are collected in memory and GET streams whole files, so
+        # move data in 1 MiB blocks instead of wsgidav's default 8 KiB.
+        "block_size": 1 << 20,
+        # RequestResolver must stay last, so insert just before it.
+        "middleware_stack": [
+            *DEFAULT_CONFIG["middleware_stack"][:-1],
+            CacheControl,
+            DEFAULT_CONFIG["middleware_stack"][-1],
+        ],
         "http_authenticator": {
             "domain_controller": SimpleDomainController,
             "accept_basic": True,
@@ -493,4 +891,8 @@ if __name__ == "__main__":
 
     app = make_app(root_path, verbose=args.verbose, username=args.user, password=args.password)
     print(f"Serving on http://{args.host}:{args.port}/")
-    make_server(args.host, args.port, cast(WSGIApplication, app)).serve_forever()
+    make_server(
+        args.host, args.port, cast(WSGIApplication, app),
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietWSGIRequestHandler,
+    ).serve_forever()
@@ -1,7 +1,7 @@
 from .core import IMAGE_EXTENSIONS, now
 from .models import File, Folder, Meta
 from .source import EagleLibrarySource
-from .type import ID, Stem
+from .type import ID, Stem, VPath
 
 __all__ = [
     "ID",
@@ -11,5 +11,6 @@ __all__ = [
     "Folder",
     "Meta",
     "Stem",
+    "VPath",
     "now",
 ]
@@ -1,4 +1,9 @@
+import itertools
+import os
 import time
+from functools import cache
+
+from .type import VPath  # noqa: TC001
 
 
 def now() -> int:
@@ -7,27 +12,59 @@ def now() -> int:
     Returns:
         当前时间的毫秒级 Unix 时间戳。
     """
-    return int(time.time() * 1000)
+    return time.time_ns() // 1_000_000
+
+
+def join_path(parent: VPath, name: str) -> VPath:
+    """拼接虚拟路径。
+
+    Args:
+        parent: 父路径，根目录为空字符串。
+        name: 子项名称。
+
+    Returns:
+        子项的虚拟路径。
+    """
+    return f"{parent}/{name}" if parent else name
+
+
+def split_path(path: VPath) -> tuple[VPath, str]:
+    """将虚拟路径拆分为父路径和名称，等价于 ``Path.parent`` 与 ``Path.name``。"""
+    parent, _, name = path.rpartition("/")
+    return parent, name
+
+
+def split_name(name: str) -> tuple[str, str]:
+    """将文件名拆分为主干和扩展名（不含点），等价于 ``Path.stem`` 与 ``Path.suffix``。"""
+    stem, _, ext = name.rpartition(".")
+    if not stem or not ext:
+        return name, ""
+    return stem, ext
+
+
+_BASE36_ALPHABET = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# 起点随机，降低多个进程同时生成 ID 时的碰撞概率；next() 在 C 层完成，线程安全
+_sequence = itertools.count(int.from_bytes(os.urandom(3)))
 
 
 def new_id():
-    timestamp = int(time.time() * 1000) - 1090000000000
-    worker_id = 2
-    process_id = 3
-    sequence = 7777777
-    snowflake_id = timestamp << 22 | worker_id << 17 | process_id << 12 | sequence
-    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    base36_id = ""
+    timestamp = time.time_ns() // 1_000_000 - 1090000000000
+    # 低 22 位为递增序列：原先固定的 worker/process/sequence 会让同一毫秒内生成的 ID 相同
+    snowflake_id = timestamp << 22 | next(_sequence) & 0x3FFFFF
+    # 64 位整数的 base36 最多 13 位，从右往左写入定长缓冲区，避免字符串前插的平方复杂度
+    buf = bytearray(13)
+    i = 13
     num = snowflake_id
     while num > 0:
-        num, i = divmod(num, 36)
-        base36_id = alphabet[i] + base36_id
+        num, digit = divmod(num, 36)
+        i -= 1
+        buf[i] = _BASE36_ALPHABET[digit]
 
-    return "M" + base36_id
+    return "M" + buf[i:].decode("ascii")
 
 
 # 支持的图片格式（用于生成缩略图）
-IMAGE_EXTENSIONS = {
+IMAGE_EXTENSIONS = frozenset({
     "jpg",
     "jpeg",
     "png",
@@ -44,4 +81,13 @@ IMAGE_EXTENSIONS = {
     "jfif",
     "pjpeg",
     "pjp",
-}
+})
+
+
+@cache
+def is_image_ext(ext: str) -> bool:
+    """判断扩展名是否为支持的图片格式（不区分大小写）。
+
+    扩展名种类很少，按原始扩展名缓存结果，避免每次调用都 lower() 分配新字符串。
+    """
+    return ext.lower() in IMAGE_EXTENSIONS
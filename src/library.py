@@ -1,120 +1,582 @@
+import atexit
+import contextlib
+import heapq
+import io
 import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import ClassVar
 
-from msgspec import Struct, field, json
+from msgspec import DecodeError, Struct, field, json, msgpack
 from PIL import Image
 
-from .core import IMAGE_EXTENSIONS, new_id, now
+from .core import is_image_ext, join_path, new_id, now
 from .models import File, Folder, Meta
-from .type import ID
+from .type import ID, VPath
 
 mtime_loader = json.Decoder(dict[ID, int]).decode
-saver = json.Encoder().encode
+meta_loader = json.Decoder(Meta).decode
+file_loader = json.Decoder(File).decode
+_encoder = json.Encoder()
 ROOT_ID = "root"
 VOID_ID = "null"
+SNAPSHOT_NAME = ".eagle-fuss.cache"
+
+
+class Snapshot(Struct, gc=False):
+    """素材元数据快照。
+
+    mtime.json 未变化时素材也不会变化，此时直接读取快照，
+    跳过逐个解析 images/*/metadata.json；变化时只需重新读取时间戳有变化的素材。
+    """
+
+    stamp: tuple[int, int]
+    """生成快照时 mtime.json 的 (st_mtime_ns, st_size)。"""
+
+    mtimes: dict[ID, int]
+    """生成快照时 mtime.json 的内容，用于找出之后发生变化的素材。"""
+
+    files: list[File]
+    """未删除的素材元数据。"""
+
+
+_READ_CHUNK = 1 << 16
+# Windows 上 os.open 默认以文本模式打开，会转换换行并在 0x1A 处截断，必须显式指定二进制模式
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def read_bytes(path: "str | Path") -> bytes | bytearray:
+    """读取整个文件。
+
+    元数据文件直接用文件描述符读取，省去 Path.read_bytes 创建文件对象和缓冲区的开销；
+    素材的 metadata.json 通常只有几 KB，一次 read 即可读完。
+    素材库的 metadata.json、mtime.json 可能有几十 MB，按文件大小预分配缓冲区直接读入，
+    不再分块读取后拼接，整份内容少复制一次；msgspec 可直接解码 bytearray。
+    不使用 mmap：Eagle 原地改写文件时映射区域被截断会导致进程收到 SIGBUS。
+    """
+    fd = os.open(path, os.O_RDONLY | _O_BINARY)
+    try:
+        data = os.read(fd, _READ_CHUNK)
+        if len(data) < _READ_CHUNK:
+            return data
+        buf = bytearray(max(os.fstat(fd).st_size, len(data)))
+        buf[: len(data)] = data
+        pos = len(data)
+        # FileIO.readinto 在所有平台上都可用（os.readv 只存在于 POSIX）；closefd=False 由外层关闭
+        with io.FileIO(fd, "rb", closefd=False) as f, memoryview(buf) as view:
+            while pos < len(buf) and (n := f.readinto(view[pos:])):
+                pos += n
+        del buf[pos:]
+        # 读取期间文件可能变长，继续读到末尾
+        while chunk := os.read(fd, _READ_CHUNK):
+            buf += chunk
+        return buf
+    finally:
+        os.close(fd)
+
+
+def write_bytes(path: "str | Path", data: bytes) -> None:
+    """覆盖写入整个文件，与 read_bytes 对应，路径可直接传入拼接好的字符串。"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+# 所有 JSON 保存共用一个编码缓冲区：请求和定时写回都运行在临时创建的线程上，
+# 按线程缓存的缓冲区几乎不会被再次使用
+_json_buffer = bytearray()
+_json_lock = threading.Lock()
+
+
+def save_json(path: "str | Path", obj: object) -> None:
+    """把对象编码为 JSON 并原子地写入文件。
+
+    编码到共用的缓冲区，不必为大的 metadata.json / mtime.json 每次分配新的 bytes；
+    先写临时文件再替换，Eagle 和 update_cache 不会读到写了一半的文件。
+    """
+    tmp = f"{path}.tmp"
+    with _json_lock:
+        _encoder.encode_into(obj, _json_buffer)
+        write_bytes(tmp, _json_buffer)
+    Path(tmp).replace(path)
+
+
+class MtimeWriter:
+    """合并写入 mtime.json。
+
+    每次保存素材都完整读写一遍 mtime.json 的代价与素材总数成正比，
+    这里先把更新记在内存中，在最后一次更新 FLUSH_DELAY 秒后统一写回。
+    写回时若磁盘上的文件已被 Eagle 修改则重新读取再合并，不会覆盖其间的修改；
+    否则直接沿用上次写回的内容。
+    """
+
+    FLUSH_DELAY = 1.0
+
+    __slots__ = ("_cache", "_lock", "_path", "_pending", "_timer")
+
+    _writers: "dict[str, MtimeWriter]" = {}
+    _writers_lock = threading.Lock()
+
+    def __init__(self, path: "Path") -> None:
+        self._path = path
+        self._pending: dict[ID, int] = {}
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        # 上次写回后文件的 (st_mtime_ns, st_size) 与内容，文件未被他人修改时免去重新解析
+        self._cache: tuple[tuple[int, int], dict[ID, int]] | None = None
+
+    @classmethod
+    def of(cls, library_path: "str | Path") -> "MtimeWriter":
+        """获取素材库对应的写入器，同一素材库共享一个实例。
+
+        按路径字符串索引，素材保存时可直接传入由素材目录截取的字符串，不必构造 Path。
+        """
+        key = os.fspath(library_path)
+        with cls._writers_lock:
+            if (writer := cls._writers.get(key)) is None:
+                writer = cls._writers[key] = cls(Path(key) / "mtime.json")
+            return writer
+
+    @classmethod
+    def flush_all(cls) -> None:
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    def set(self, id: ID, time: int) -> None:
+        with self._lock:
+            self._pending[id] = time
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            try:
+                st = self._path.stat()
+                if self._cache is not None and self._cache[0] == (st.st_mtime_ns, st.st_size):
+                    mtime = self._cache[1]
+                else:
+                    mtime = mtime_loader(read_bytes(self._path))
+                mtime.update(self._pending)
+                save_json(self._path, mtime)
+                st = self._path.stat()
+                self._cache = ((st.st_mtime_ns, st.st_size), mtime)
+            except OSError as e:
+                logging.warning("写入 mtime.json 失败 %s: %s", self._path, e)
+                return
+            self._pending.clear()
+
+
+atexit.register(MtimeWriter.flush_all)
+
+
+class ThumbnailWriter:
+    """延迟生成缩略图。
+
+    同一素材在短时间内可能被连续写入多次（客户端常先写入空文件再写入内容），
+    每次都完整解码、缩放、编码一遍代价很高。这里在最后一次写入 DELAY 秒后
+    才生成一次缩略图，生成时从磁盘读取最终的数据。
+
+    等待由单个调度线程完成：每个素材最新的到期时间记录在字典中，另有按到期时间排序的堆，
+    调度线程每次只需查看堆顶。同一素材再次写入只更新字典并压入新的堆项，旧的堆项出堆时
+    与字典中的到期时间不一致，直接丢弃。连续上传大量文件时也不会为每次写入各启动一个计时线程。
+
+    生成工作交给固定大小的线程池：Pillow 在解码、缩放和编码时释放 GIL，
+    线程即可利用多核；一次拖入大量图片时也不会同时解码全部图片占满内存。
+    """
+
+    DELAY = 1.0
+
+    _pending: "dict[str, tuple[float, ImageSource]]" = {}
+    _heap: list[tuple[float, str]] = []
+    _cond = threading.Condition()
+    _scheduler: threading.Thread | None = None
+    _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="thumbnail")
+
+    @classmethod
+    def schedule(cls, image: "ImageSource") -> None:
+        deadline = time.monotonic() + cls.DELAY
+        with cls._cond:
+            cls._pending[image.source] = (deadline, image)
+            heapq.heappush(cls._heap, (deadline, image.source))
+            if cls._scheduler is None:
+                cls._scheduler = threading.Thread(
+                    target=cls._loop, name="thumbnail-scheduler", daemon=True
+                )
+                cls._scheduler.start()
+            cls._cond.notify()
+
+    @classmethod
+    def _loop(cls) -> None:
+        heap, pending = cls._heap, cls._pending
+        with cls._cond:
+            while True:
+                current = time.monotonic()
+                while heap and heap[0][0] <= current:
+                    deadline, key = heap[0]
+                    entry = pending.get(key)
+                    if entry is not None and entry[0] == deadline:
+                        try:
+                            cls._pool.submit(entry[1].save_thumb)
+                        except RuntimeError:
+                            # 解释器退出时线程池不再接受任务，素材留在 _pending 中由 flush_all 生成
+                            return
+                        del pending[key]
+                    heapq.heappop(heap)
+                cls._cond.wait(heap[0][0] - current if heap else None)
+
+    @classmethod
+    def flush_all(cls) -> None:
+        with cls._cond:
+            pending = list(cls._pending.values())
+            cls._pending.clear()
+            cls._heap.clear()
+        for _, image in pending:
+            image.save_thumb()
+
+
+atexit.register(ThumbnailWriter.flush_all)
+
+
+# 描述符缓存依赖 os.pread 按偏移读取；Windows 没有 os.pread，而且打开着的文件
+# 会让 Eagle 和本服务的删除、重命名失败，因此只在 POSIX 系统上复用描述符
+_SHARE_DESCRIPTORS = hasattr(os, "pread")
+_HAS_PREADV = hasattr(os, "preadv")
+
+
+class PreadFile(io.RawIOBase):
+    """共享文件描述符上的只读文件对象，用 os.pread 按偏移读取。
+
+    多个读取者共用一个描述符，各自维护读取位置，互不干扰；关闭时只归还描述符。
+    """
+
+    def __init__(self, pool: "OpenFiles", key: tuple, fd: int) -> None:
+        super().__init__()
+        self._pool = pool
+        self._key = key
+        self._fd = fd
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += os.fstat(self._fd).st_size
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = max(os.fstat(self._fd).st_size - self._pos, 0)
+        data = os.pread(self._fd, size, self._pos)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        if _HAS_PREADV:
+            # 直接读入调用方的缓冲区，省去中间 bytes 对象的分配和拷贝
+            n = os.preadv(self._fd, [buffer], self._pos)
+        else:
+            # macOS 11 之前等系统只有 os.pread，读出后再拷入缓冲区
+            with memoryview(buffer) as view:
+                data = os.pread(self._fd, len(view), self._pos)
+                n = len(data)
+                view[:n] = data
+        self._pos += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._pool.release(self._key)
+        super().close()
+
+
+class OpenFiles:
+    """素材数据文件的只读描述符缓存。
+
+    播放器和下载工具常把一个文件拆成大量 Range 请求，每次都重新打开、定位、关闭文件。
+    这里按 (id, modificationTime) 复用描述符，素材被修改后自然换用新的描述符；
+    超出 maxsize 时按最久未用的顺序关闭没有读取者的描述符。
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self._maxsize = maxsize
+        # key -> [fd, 读取者数量]
+        self._fds: OrderedDict[tuple, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, path: "str | Path", key: tuple) -> PreadFile:
+        with self._lock:
+            entry = self._fds.get(key)
+            if entry is None:
+                entry = self._fds[key] = [os.open(path, os.O_RDONLY | _O_BINARY), 0]
+            else:
+                self._fds.move_to_end(key)
+            entry[1] += 1
+            self._evict()
+            return PreadFile(self, key, entry[0])
+
+    def release(self, key: tuple) -> None:
+        with self._lock:
+            self._fds[key][1] -= 1
+            self._evict()
+
+    def _evict(self) -> None:
+        excess = len(self._fds) - self._maxsize
+        if excess <= 0:
+            return
+        idle = [key for key, (_, readers) in self._fds.items() if not readers]
+        for key in idle[:excess]:
+            os.close(self._fds.pop(key)[0])
+
+
+open_files = OpenFiles()
+
+
+snapshot_loader = msgpack.Decoder(Snapshot).decode
+snapshot_saver = msgpack.Encoder().encode
 
 
 class Source(Struct, frozen=True):
     path: "Path"
     meta: Meta
-    _meta_loader = json.Decoder(Meta).decode
 
     @classmethod
     def load(cls, path: "Path"):
-        return Source(
-            path=path, meta=cls._meta_loader((path / "metadata.json").read_text(encoding="utf-8"))
-        )
+        return Source(path=path, meta=meta_loader(read_bytes(path / "metadata.json")))
 
     def image(self, id: "ID"):
         return ImageSource.load(self.path, id)
 
     def read_mtime(self):
-        return mtime_loader((self.path / "mtime.json").read_text(encoding="utf-8"))
+        return mtime_loader(read_bytes(self.path / "mtime.json"))
 
     def read_meta(self):
-        return self._meta_loader((self.path / "metadata.json").read_text(encoding="utf-8"))
+        return meta_loader(read_bytes(self.path / "metadata.json"))
+
+    def read_snapshot(self) -> Snapshot | None:
+        try:
+            return snapshot_loader(read_bytes(self.path / SNAPSHOT_NAME))
+        except (FileNotFoundError, DecodeError):
+            return None
+
+    def save_snapshot(self, snapshot: Snapshot):
+        # 先写临时文件再替换，崩溃或并发启动时不会留下截断的快照；
+        # 临时文件名带上进程号，同时启动的多个进程不会写入同一个临时文件
+        path = f"{self.path}/{SNAPSHOT_NAME}"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            write_bytes(tmp, snapshot_saver(snapshot))
+            Path(tmp).replace(path)
+        except OSError as e:
+            logging.warning("写入快照失败 %s: %s", self.path, e)
+            with contextlib.suppress(OSError):
+                Path(tmp).unlink(missing_ok=True)
 
     def save_meta(self):
         # TODO: 从source重新解析目录树
-        (self.path / "metadata.json").write_bytes(saver(self.meta))
+        save_json(self.path / "metadata.json", self.meta)
 
     def create_root(self):
         _void_folder = Folder(id=VOID_ID, name="未分类")
         root_folder = FolderSource(
             Folder(id=ROOT_ID, name="根目录", children=[_void_folder, *self.meta.folders]),
-            Path(),
+            "",
             self.path,
         )
         void_folder = root_folder / _void_folder
         return root_folder, void_folder
 
 
+def image_size(data: bytes) -> tuple[int, int]:
+    """获取图片尺寸。
+
+    Image.open 只解析文件头，不解码像素；缩略图由 ThumbnailWriter 稍后从磁盘生成，
+    这里无需保留打开的图片。客户端常先上传空文件，SVG 等格式 Pillow 也无法识别，
+    这些情况返回 (0, 0) 而不是让整个上传失败。
+    """
+    try:
+        with Image.open(BytesIO(data)) as img:
+            return img.size
+    except (OSError, Image.DecompressionBombError):
+        return 0, 0
+
+
+# 可直接用 LANCZOS 缩放的图像模式
+_RESIZABLE_MODES = frozenset({"RGB", "RGBA", "L"})
+
+
+# 素材 ID -> 生成缩略图时数据文件的 (st_mtime_ns, st_size)，签名不变时无需重新解码
+_thumb_signatures: dict[ID, tuple[int, int]] = {}
+
+
 class ImageSource(Struct):
     meta: File
-    source: "Path"
-    targets: set["Path"] = field(default_factory=set)
-    _loader: ClassVar = json.Decoder(File).decode
+    source: str
+    """素材目录（images/{id}.info）。以字符串保存，加载大量素材时不必逐个构造 Path。"""
+
+    targets: set[VPath] = field(default_factory=set)
 
     @classmethod
     def load(cls, src: "Path", id: "ID"):
-        folder = src / "images" / (id + ".info")
-        return ImageSource(
-            meta=cls._loader((folder / "metadata.json").read_text(encoding="utf-8")), source=folder
-        )
+        return cls.load_dir(f"{src}/images/{id}.info")
+
+    @classmethod
+    def load_dir(cls, folder: "str | Path"):
+        """从素材目录（{素材库}/images/{id}.info）读取素材。
+
+        路径全程以字符串拼接，读取过程中不构造任何 Path 对象。
+        """
+        meta = file_loader(read_bytes(f"{folder}/metadata.json"))
+        return ImageSource(meta=meta, source=os.fspath(folder))
 
+    # 读写路径直接以字符串拼接，文件操作也直接使用字符串路径，不构造 Path
     @property
-    def _data(self):
-        return self.source / self.meta.fullname
+    def _data(self) -> str:
+        return f"{self.source}/{self.meta.name}.{self.meta.ext}"
 
     @property
-    def _thumb(self):
-        return self.source / f"{self.meta.id}_thumbnail.png"
+    def _thumb(self) -> str:
+        return f"{self.source}/{self.meta.id}_thumbnail.png"
 
     @property
     def is_image(self):
-        return self.meta.ext.lower() in IMAGE_EXTENSIONS
+        return is_image_ext(self.meta.ext)
 
     def read_data(self):
-        return self._data.read_bytes()
+        return read_bytes(self._data)
+
+    def open_data(self):
+        """打开数据文件供调用方按块读取，而不必整体载入内存。
+
+        POSIX 系统上同一素材的描述符会被复用；其他系统每次单独打开，由调用方用完即关闭。
+        """
+        if not _SHARE_DESCRIPTORS:
+            return open(self._data, "rb")  # noqa: PTH123
+        return open_files.open(self._data, (self.meta.id, self.meta.modificationTime))
 
     def read_thumb(self):
-        return self._thumb.read_bytes() if self._thumb.exists() else b""
+        try:
+            return read_bytes(self._thumb)
+        except FileNotFoundError:
+            return b""
+
+    @property
+    def _library(self) -> str:
+        # source 总是以 "{素材库}/images/{id}.info" 的形式拼接，截取即可得到素材库路径
+        return self.source.rpartition("/images/")[0]
 
     def add_mtime(self):
-        f = self.source.parent.parent / "mtime.json"
-        mtime = mtime_loader(f.read_text(encoding="utf-8"))
-        mtime[self.meta.id] = self.meta.modificationTime
-        f.write_bytes(saver(mtime))
+        MtimeWriter.of(self._library).set(self.meta.id, self.meta.modificationTime)
 
-    def save_meta(self):
-        if not self.source.exists():
-            self.source.mkdir(parents=True)
-        self.meta.modificationTime = now()
+    def _make_dir(self) -> None:
+        """创建素材目录。
+
+        只有新素材的第一次写入会因目录不存在而失败，写入时捕获 FileNotFoundError 再创建，
+        已有素材的每次保存都省去一次 mkdir 系统调用。
+        """
+        os.makedirs(self.source, exist_ok=True)  # noqa: PTH103
+
+    def save_meta(self, time: int | None = None):
+        """写回元数据；调用方已取得当前时间时可传入 time，省去再次取时间。"""
+        self.meta.modificationTime = now() if time is None else time
         self.add_mtime()
-        (self.source / "metadata.json").write_bytes(saver(self.meta))
+        path = f"{self.source}/metadata.json"
+        try:
+            save_json(path, self.meta)
+        except FileNotFoundError:
+            self._make_dir()
+            save_json(path, self.meta)
 
-    def save_data(self, data: bytes):
-        if not self.source.exists():
-            self.source.mkdir(parents=True)
-        (self.source / self.meta.fullname).write_bytes(data)
+    def save_data(self, data: bytes, time: int | None = None):
+        try:
+            write_bytes(self._data, data)
+        except FileNotFoundError:
+            self._make_dir()
+            write_bytes(self._data, data)
         self.meta.size = len(data)
-        self.save_meta()
-        if self.meta.ext.lower() not in IMAGE_EXTENSIONS:
+        self.save_meta(time)
+        if is_image_ext(self.meta.ext):
+            ThumbnailWriter.schedule(self)
+        return True
+
+    def save_thumb(self):
+        # 在打开图片之前记下数据文件的签名：编码期间若有新的写入，签名随之变化，
+        # 为新数据安排的生成任务不会因为旧缩略图的写入时间较晚而被跳过
+        try:
+            st = os.stat(self._data)  # noqa: PTH116
+        except OSError as e:
+            logging.error("生成缩略图失败 %s: %s", self.source, e)
+            return False
+        signature = (st.st_mtime_ns, st.st_size)
+        if _thumb_signatures.get(self.meta.id) == signature:
             return True
         try:
-            with Image.open(BytesIO(data)) as img:
+            with Image.open(self._data) as img:
                 ori_size = img.size
                 scale = min(1, 320 / min(ori_size))
-                img.convert("RGB").resize(
-                    (int(ori_size[0] * scale), int(ori_size[1] * scale)), Image.Resampling.LANCZOS
-                ).save(self._thumb, "PNG", optimize=True)
+                size = (int(ori_size[0] * scale), int(ori_size[1] * scale))
+                # JPEG 可在解码时按 1/2~1/8 缩小，跳过用不到的像素；其他格式为空操作
+                img.draft("RGB", size)
+                # 调色板等模式不能直接高质量缩放，先转换；RGB/RGBA/L 留到缩小后再转换，少处理像素
+                thumb = img if img.mode in _RESIZABLE_MODES else img.convert("RGB")
+                # thumbnail 先按整数倍快速缩小到目标尺寸的 reducing_gap 倍以内，
+                # 再用 LANCZOS 完成剩余部分，大图远快于直接对原图做 LANCZOS
+                thumb.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                # 缩略图只在本地读取，低压缩等级换取更快的编码
+                thumb.convert("RGB").save(self._thumb, "PNG", compress_level=1)
+            _thumb_signatures[self.meta.id] = signature
             return True
         except Exception as e:
-            logging.error(f"生成缩略图失败 {self.source}: {e}")
+            logging.error("生成缩略图失败 %s: %s", self.source, e)
             return False
 
+    def rename(self, name: str, ext: str):
+        """重命名素材，数据文件按新的文件名移动。
+
+        先移动数据文件再修改元数据；任一步骤失败时撤销已完成的部分并抛出 OSError，
+        素材保持原来的名称。
+        """
+        old_name, old_ext = self.meta.name, self.meta.ext
+        old, new = self._data, f"{self.source}/{name}.{ext}"
+        if new != old:
+            os.rename(old, new)  # noqa: PTH104
+        self.meta.name, self.meta.ext = name, ext
+        try:
+            self.save_meta()
+        except OSError:
+            self.meta.name, self.meta.ext = old_name, old_ext
+            if new != old:
+                os.rename(new, old)  # noqa: PTH104
+            raise
+
     def delete(self):
         self.meta.isDeleted = True
         self.save_meta()
@@ -122,25 +584,28 @@ class ImageSource(Struct):
 
 class FolderSource(Struct):
     meta: Folder
-    target: "Path"
+    target: VPath
     library_path: "Path"
     files: dict[str, "ImageSource"] = field(default_factory=dict)
     subfolders: dict[str, "FolderSource"] = field(default_factory=dict)
 
     def add_file(self, file: ImageSource):
-        if file.meta.fullname in self.files or file.meta.fullname in self.subfolders:
+        name = file.meta.fullname
+        if name in self.files or name in self.subfolders:
             return False
-        self.files[file.meta.fullname] = file
+        self.files[name] = file
         return True
 
     def __truediv__(self, other: Folder):
-        return FolderSource(other, self.target / other.fullname, self.library_path)
+        # 路径会同时作为 path_to_id 的键和 target 长期保存，驻留后两处共享同一对象
+        target = sys.intern(join_path(self.target, other.fullname))
+        return FolderSource(other, target, self.library_path)
 
     def new_file(self, data: bytes, stem: str, ext: str):
         filename = f"{stem}.{ext}"
         if filename in self.files or filename in self.subfolders:
             return None
-        size = Image.open(BytesIO(data)).size if ext in IMAGE_EXTENSIONS else (0, 0)
+        size = image_size(data) if is_image_ext(ext) else (0, 0)
         time = now()
         file = File(
             id=new_id(),
@@ -160,10 +625,10 @@ class FolderSource(Struct):
             lastModified=time,
             palettes=[],
         )
-        info_path = self.library_path / "images" / (file.id + ".info")
-        image = ImageSource(file, info_path, targets={self.target / file.fullname})
-        self.files[image.meta.fullname] = image
-        image.save_data(data)
+        info_path = f"{self.library_path}/images/{file.id}.info"
+        image = ImageSource(file, info_path, targets={join_path(self.target, filename)})
+        self.files[filename] = image
+        image.save_data(data, time)
         return image
 
     def new_subfolder(self, name: str):
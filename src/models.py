@@ -1,9 +1,16 @@
+"""Eagle 素材库数据模型。
+
+本模块定义了与素材库中 JSON 文件对应的 msgspec 结构体。
+这些结构体的实例只构成树状结构、不会形成循环引用，需要大量实例化的结构体均声明
+``gc=False``，关闭 GC 跟踪以减少大量实例的分配和回收开销。
+"""
+
 from msgspec import Struct, field
 
 from .type import ID, Stem  # noqa: TC001
 
 
-class Rule(Struct, frozen=True):
+class Rule(Struct, frozen=True, gc=False):
     """智能文件夹筛选规则。
 
     定义了智能文件夹中单个筛选条件的规则，
@@ -26,7 +33,7 @@ class Rule(Struct, frozen=True):
     """筛选值列表，规则将根据这些值进行匹配。"""
 
 
-class Condition(Struct, frozen=True):
+class Condition(Struct, frozen=True, gc=False):
     """智能文件夹筛选条件。
 
     由多个规则组合而成的筛选条件，支持逻辑组合。
@@ -48,7 +55,8 @@ class Condition(Struct, frozen=True):
     """布尔逻辑，如 "and"、"or"。"""
 
 
-class Folder(Struct):
+# 代码中只按身份比较实例，不需要逐字段比较的 __eq__
+class Folder(Struct, gc=False, eq=False):
     """Eagle 素材库文件夹模型。
 
     表示素材库中的文件夹，支持树形层级结构。
@@ -64,8 +72,8 @@ class Folder(Struct):
         conditions: 智能文件夹的筛选条件列表。
 
     Note:
-        subdirs 和 subfiles 字段在 __post_init__ 中填充，
-        用于建立父子关系的弱引用映射。
+        按名称查找子项使用 FolderSource.subfolders / files 两个普通字典，
+        模型本身只保存 metadata.json 中的树状结构。
     """
 
     id: ID = ""
@@ -119,7 +127,7 @@ class TagGroup(Struct, frozen=True):
     """包含的标签列表。"""
 
 
-class Meta(Struct):
+class Meta(Struct, gc=False):
     """Eagle 素材库主元数据模型。
 
     对应素材库根目录下的 metadata.json 文件，
@@ -132,12 +140,10 @@ class Meta(Struct):
         tagsGroups: 标签组列表。
         modificationTime: 素材库最后修改时间（毫秒时间戳）。
         applicationVersion: Eagle 应用版本号。
-        _subdirs: 顶层文件夹的弱引用字典，用于快速查找。
 
     Example:
         ```python
         meta = json.decode(metadata_json, type=Meta)
-        folder = meta.find("设计素材/图标")
         ```
     """
 
@@ -160,7 +166,7 @@ class Meta(Struct):
     """Eagle 应用版本号。"""
 
 
-class Palette(Struct, frozen=True):
+class Palette(Struct, frozen=True, gc=False):
     """素材调色板颜色信息。
 
     表示素材图片中提取的主要颜色及其占比。
@@ -178,7 +184,8 @@ class Palette(Struct, frozen=True):
     """该颜色在图片中的占比百分比。"""
 
 
-class File(Struct):
+# 代码中只按身份比较实例，不需要逐字段比较的 __eq__
+class File(Struct, gc=False, eq=False):
     """Eagle 素材文件模型。
 
     表示素材库中的单个素材，对应 images/{id}/metadata.json 文件。
@@ -1,14 +1,67 @@
+import atexit
 import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from typing import TYPE_CHECKING
 
-from .core import now
-from .library import ROOT_ID, VOID_ID, FolderSource, ImageSource, Source
+from .core import join_path, now, split_name, split_path
+from .library import (
+    ROOT_ID,
+    VOID_ID,
+    FolderSource,
+    ImageSource,
+    MtimeWriter,
+    Snapshot,
+    Source,
+    image_size,
+)
 
 if TYPE_CHECKING:
     from pathlib import Path
 
-    from .models import Folder
-    from .type import ID
+    from .models import File, Folder
+    from .type import ID, VPath
+
+META_FLUSH_DELAY = 0.5
+"""metadata.json 延迟写回的时间（秒）。"""
+
+CHECK_INTERVAL_NS = 1_000_000_000
+"""两次检查素材库文件变化的最小间隔（纳秒）。"""
+
+# 元数据读取以 IO 为主，线程数按 CPU 数放大，上限与 ThreadPoolExecutor 的默认值一致
+_LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _synchronized(func):
+    """在数据源的锁内执行方法，保证多线程服务下的映射修改不会交错。"""
+
+    @wraps(func)
+    def wrapper(self: "EagleLibrarySource", *args, **kwargs):
+        with self._lock:
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _mutation(func):
+    """在锁内执行修改映射的方法，结束后递增 generation，使外部缓存失效。"""
+
+    @wraps(func)
+    def wrapper(self: "EagleLibrarySource", *args, **kwargs):
+        with self._lock:
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.generation += 1
+                # 写入后下一次读取立即检查一次，尽快发现写入期间的外部修改
+                self._next_check = 0
+
+    return wrapper
 
 
 class EagleLibrarySource:
@@ -20,8 +73,15 @@ class EagleLibrarySource:
 
     __slots__ = (
         "_last_check_time",
+        "_lock",
+        "_meta_stamp",
+        "_meta_timer",
+        "_mtime_stamp",
+        "_mtimes",
+        "_next_check",
         "file_id_map",
         "folder_id_map",
+        "generation",
         "path_to_id",
         "src",
     )
@@ -32,6 +92,14 @@ class EagleLibrarySource:
         Args:
             path: Eagle 素材库的根目录路径。
         """
+        self._lock = threading.RLock()
+        self._meta_timer: threading.Timer | None = None
+        self.generation = 0
+        """映射内容每次变化时递增，外部缓存据此判断是否失效"""
+        atexit.register(self.flush)
+        # 先记录文件戳再读取，读取期间发生的外部修改会在下次 update_cache 时被发现
+        self._meta_stamp = self._stamp(path / "metadata.json")
+        self._mtime_stamp = self._stamp(path / "mtime.json")
         self.src = Source.load(path)
         root, void = self.src.create_root()
 
@@ -39,7 +107,7 @@ class EagleLibrarySource:
         """通过ID查找文件的映射"""
         self.folder_id_map: dict[ID, FolderSource] = {}
         """通过ID查找文件夹的映射"""
-        self.path_to_id: dict[Path, ID] = {void.target: VOID_ID, root.target: ROOT_ID}
+        self.path_to_id: dict[VPath, ID] = {void.target: VOID_ID, root.target: ROOT_ID}
         """通过文件或文件夹路径查找ID的映射"""
 
         # 子文件夹和子文件直接去对象里找
@@ -47,55 +115,145 @@ class EagleLibrarySource:
         """元数据信息"""
         # region 初始化文件
         self._init_subfolder(root)
-        void = self.folder_id_map[VOID_ID]  # 重新绑定到已注册的实例，与 folder_id_map 保持一致
-
-        def _init_image(parent: FolderSource, image: ImageSource):
-            name = image.meta.fullname
-            if name in parent.files or name in parent.subfolders:
-                stem, ext = image.meta.name, image.meta.ext
-                counter = 2
-                while name in parent.files or name in parent.subfolders:
-                    name = f"{stem} ({counter}).{ext}"
-                    counter += 1
-            parent.files[name] = image
-            self.file_id_map[image.meta.id] = image
-            target = parent.target / name
-            image.targets.add(target)
-            self.path_to_id[target] = image.meta.id
 
         # 建立文件和ID的映射
-        for dir in (self.src.path / "images").iterdir():
-            try:
-                image = self.src.image(dir.name[:-5])
-            except FileNotFoundError:
-                logging.warning(f"文件夹存在 {dir.name} 但没有 metadata，可能是废弃文件")
-                continue
-
-            if image.meta.isDeleted:
-                continue
-
-            if image.meta.folders:
-                for folder_id in image.meta.folders:
-                    _folder = self.folder_id_map.get(folder_id)
-                    if _folder is None:
-                        logging.warning(f"文件夹 {folder_id} 不存在，可能是文件夹结构变化")
-                        _init_image(void, image)
-                        continue
-                    _init_image(_folder, image)
-            else:
-                _init_image(void, image)
+        for image in self._load_images():
+            self._place_image(image)
         self._last_check_time = now()
+        self._next_check = time.monotonic_ns() + CHECK_INTERVAL_NS
         # endregion
 
+    def _place_image(self, image: ImageSource) -> None:
+        """把素材挂到它所属的每个文件夹下，没有所属文件夹或文件夹不存在时放入未分类。"""
+        void = self.folder_id_map[VOID_ID]
+        if not image.meta.folders:
+            self._attach_image(void, image)
+            return
+        for folder_id in image.meta.folders:
+            folder = self.folder_id_map.get(folder_id)
+            if folder is None:
+                logging.warning("文件夹 %s 不存在，可能是文件夹结构变化", folder_id)
+                folder = void
+            self._attach_image(folder, image)
+
+    def _attach_image(self, parent: FolderSource, image: ImageSource) -> None:
+        """在文件夹中注册素材，重名时依次尝试 "名称 (2).扩展名" 等名称。"""
+        name = image.meta.fullname
+        if name in parent.files or name in parent.subfolders:
+            stem, ext = image.meta.name, image.meta.ext
+            counter = 2
+            while name in parent.files or name in parent.subfolders:
+                name = f"{stem} ({counter}).{ext}"
+                counter += 1
+        parent.files[name] = image
+        self.file_id_map[image.meta.id] = image
+        target = sys.intern(join_path(parent.target, name))
+        image.targets.add(target)
+        self.path_to_id[target] = image.meta.id
+
+    def _detach_image(self, image: ImageSource) -> None:
+        """从素材注册过的每个路径上移除素材。
+
+        targets 记录了素材实际挂载的位置（包括重名时改用的名称），
+        据此直接定位原来的父文件夹，不依赖可能已经变化的 meta.folders。
+        """
+        for target in image.targets:
+            self.path_to_id.pop(target, None)
+            parent, name = split_path(target)
+            if (folder := self._folder_at(parent)) is not None and folder.files.get(name) is image:
+                del folder.files[name]
+        image.targets.clear()
+
+    def _load_images(self) -> list[ImageSource]:
+        """读取所有未删除的素材。
+
+        mtime.json 自上次扫描后未变化时直接使用快照；发生变化时只重新读取
+        mtime.json 中时间戳与快照不一致的素材；没有可用快照时完整扫描。
+        """
+        snapshot = self.src.read_snapshot()
+        if snapshot is not None and snapshot.stamp == self._mtime_stamp:
+            self._mtimes = snapshot.mtimes
+            return self._images_from(snapshot.files)
+
+        mtimes = self._mtimes = self.src.read_mtime()
+        images = self._scan_images() if snapshot is None else self._apply_delta(snapshot, mtimes)
+        self.src.save_snapshot(
+            Snapshot(self._mtime_stamp, mtimes, [image.meta for image in images])
+        )
+        return images
+
+    def _images_from(self, files: "list[File]") -> list[ImageSource]:
+        images_dir = f"{self.src.path}/images"
+        return [ImageSource(meta=file, source=f"{images_dir}/{file.id}.info") for file in files]
+
+    def _apply_delta(self, snapshot: Snapshot, mtimes: "dict[ID, int]") -> list[ImageSource]:
+        """在快照的基础上只重新读取 mtime.json 中发生变化的素材。"""
+        old = snapshot.mtimes
+        changed = {id for id, time in mtimes.items() if old.get(id) != time}
+        # 曾记录在 mtime.json 中、现已被移除的素材视为已被彻底删除
+        removed = old.keys() - mtimes.keys()
+        images = self._images_from(
+            [file for file in snapshot.files if file.id not in changed and file.id not in removed]
+        )
+
+        images_dir = f"{self.src.path}/images"
+        paths = [f"{images_dir}/{id}.info" for id in changed]
+        with ThreadPoolExecutor(max_workers=_LOAD_WORKERS) as executor:
+            loaded = list(executor.map(self._load_image, paths))
+        images.extend(image for image in loaded if image is not None and not image.meta.isDeleted)
+        return images
+
+    def _scan_images(self) -> list[ImageSource]:
+        """扫描 images/ 目录，读取所有未删除素材的元数据。"""
+        # 元数据读取以 IO 为主且 msgspec 解码会释放 GIL，用线程池并发读取，主线程负责写入映射
+        # 只按名称筛选素材目录，不依赖 d_type，任何文件系统上都不会逐项 stat
+        # 路径以字符串统一拼接为 "{素材库}/images/{id}.info"，ImageSource 据此截取素材库路径；
+        # 不用 DirEntry.path，它在 Windows 上以反斜杠分隔
+        images_dir = f"{self.src.path}/images"
+        with os.scandir(images_dir) as it:
+            entries = [entry for entry in it if entry.name.endswith(".info")]
+        paths = [f"{images_dir}/{entry.name}" for entry in entries]
+        with ThreadPoolExecutor(max_workers=_LOAD_WORKERS) as executor:
+            images = list(executor.map(self._load_image, paths))
+
+        result: list[ImageSource] = []
+        for entry, image in zip(entries, images):
+            if image is None:
+                logging.warning("文件夹存在 %s 但没有 metadata，可能是废弃文件", entry.name)
+                continue
+            if not image.meta.isDeleted:
+                result.append(image)
+        return result
+
+    @staticmethod
+    def _load_image(folder: "str | Path") -> ImageSource | None:
+        """读取单个素材目录的元数据，metadata 缺失时返回 None。"""
+        try:
+            return ImageSource.load_dir(folder)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    @staticmethod
+    def _stamp(path: "Path") -> tuple[int, int]:
+        """返回文件的 (st_mtime_ns, st_size)，用于低成本判断文件是否被修改。"""
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+
     def _init_subfolder(self, folder: FolderSource, loop: bool = True) -> None:
-        """递归遍历文件夹树，建立映射关系。"""
-        self.folder_id_map[folder.meta.id] = folder
-        self.path_to_id[folder.target] = folder.meta.id
-        if loop:
-            for child in folder.meta.children:
-                subfolder = folder / child
-                folder.subfolders[child.fullname] = subfolder
-                self._init_subfolder(subfolder)
+        """遍历文件夹树，建立映射关系。
+
+        使用显式队列代替递归，避免深层目录的栈帧开销与递归深度限制。
+        """
+        queue = deque([folder])
+        while queue:
+            folder = queue.popleft()
+            self.folder_id_map[folder.meta.id] = folder
+            self.path_to_id[folder.target] = folder.meta.id
+            if loop:
+                for child in folder.meta.children:
+                    subfolder = folder / child
+                    folder.subfolders[child.fullname] = subfolder
+                    queue.append(subfolder)
 
     def update_cache(self) -> None:
         """增量更新缓存。
@@ -103,187 +261,308 @@ class EagleLibrarySource:
         根据 mtime.json 中的时间戳，仅更新发生变化的素材。
         同时检查 metadata.json 的修改时间，处理文件夹结构变化。
         """
-        # region 检查文件夹结构变化
-        if now() - self._last_check_time < 1000:  # 1秒
+        # 单调时钟不受系统时间调整影响；一次比较即可跳过间隔内的重复检查
+        if time.monotonic_ns() < self._next_check:
             return
+        with self._lock:
+            # 等锁期间可能已有其他线程完成了检查
+            if time.monotonic_ns() < self._next_check:
+                return
+            self._check_changes()
+
+    def _check_changes(self) -> None:
+        """检查素材库文件的变化并更新缓存。"""
+        # 一次 stat 远比解析 JSON 便宜，文件未变化时跳过读取
+        meta_stamp = self._stamp(self.src.path / "metadata.json")
+        mtime_stamp = self._stamp(self.src.path / "mtime.json")
+        if meta_stamp != self._meta_stamp:
+            self._meta_stamp = meta_stamp
+            self._update_folders()
+            self.generation += 1
+        if mtime_stamp != self._mtime_stamp:
+            self._mtime_stamp = mtime_stamp
+            self._update_files()
+            self.generation += 1
+        self._last_check_time = now()
+        self._next_check = time.monotonic_ns() + CHECK_INTERVAL_NS
 
+    def _update_folders(self) -> None:
+        """根据 metadata.json 更新文件夹结构。"""
         meta = self.src.read_meta()
-        all_folders = set(self.folder_id_map.keys())
-        all_folders.discard(VOID_ID)
-        all_folders.discard(ROOT_ID)
+        # 只记录本次遍历到的文件夹，结束后与 folder_id_map 的键视图做差得到已删除的文件夹，
+        # 不必先复制全部键再逐个剔除
+        visited = {ROOT_ID, VOID_ID}
 
-        def _check_folder(folder: "Folder", parent: FolderSource):
-            all_folders.discard(folder.id)
-            if folder.modificationTime > self._last_check_time:
+        # 显式栈代替递归，避免深层目录的栈帧开销与递归深度限制；父文件夹总是先于子文件夹处理
+        root = self.folder_id_map[ROOT_ID]
+        stack: list[tuple[Folder, FolderSource]] = [(folder, root) for folder in meta.folders]
+        while stack:
+            folder, parent = stack.pop()
+            visited.add(folder.id)
+            node = self.folder_id_map.get(folder.id)
+            if node is None or folder.modificationTime > self._last_check_time:
                 new = parent / folder
-                if folder.id in self.folder_id_map:
-                    new.files.update(self.folder_id_map[folder.id].files)
+                if node is not None:
+                    new.files.update(node.files)
                 self._init_subfolder(new, loop=False)
-            else:
-                new = self.folder_id_map[folder.id]
+                node = new
+            # 父文件夹可能刚被替换为新实例，子文件夹需要重新挂到它下面
+            parent.subfolders[folder.fullname] = node
+            stack.extend((child, node) for child in folder.children)
 
-            for child in folder.children:
-                _check_folder(child, new)
+        for folder_id in self.folder_id_map.keys() - visited:
+            folder = self.folder_id_map.pop(folder_id)
+            self.path_to_id.pop(folder.target, None)
+            parent, name = split_path(folder.target)
+            node = self._folder_at(parent)
+            if node is not None and node.subfolders.get(name) is folder:
+                del node.subfolders[name]
+
+    def _update_files(self) -> None:
+        """根据 mtime.json 更新发生变化的素材。"""
+        mtimes = self.src.read_mtime()
+        # 与上次读取的内容做集合差，比较在 C 层完成，只处理时间戳变化或新增的条目
+        changed = [k for k, _ in mtimes.items() - self._mtimes.items()]
+        self._mtimes = mtimes
+        if not changed:
+            return
+        # 与初始化一致，并发读取变化素材的元数据，主线程负责写入映射
+        images_dir = f"{self.src.path}/images"
+        paths = [f"{images_dir}/{k}.info" for k in changed]
+        with ThreadPoolExecutor(max_workers=_LOAD_WORKERS) as executor:
+            new_files = list(executor.map(self._load_image, paths))
+        for k, new_file in zip(changed, new_files):
+            # 先按旧素材实际注册的路径移除，素材被移动到其他文件夹时也不会留下旧条目
+            if (old_file := self.file_id_map.pop(k, None)) is not None:
+                self._detach_image(old_file)
+            if new_file is None or new_file.meta.isDeleted:
+                continue
+            self._place_image(new_file)
 
-        root = self.folder_id_map[ROOT_ID]
-        for _folder in meta.folders:
-            _check_folder(_folder, root)
+    # ==================== 延迟写入 ====================
 
-        for folder_id in all_folders:
-            folder = self.folder_id_map.pop(folder_id)
-            self.path_to_id.pop(folder.target)
+    def _save_meta(self) -> None:
+        """在最后一次修改 META_FLUSH_DELAY 秒后写回 metadata.json。
 
-        # endregion
-        # 检查文件变化
-        for k, v in self.src.read_mtime().items():
-            if v > self._last_check_time:
-                if k in self.file_id_map:
-                    old_file = self.file_id_map.pop(k)
-                    # 先从目录中删除
-                    for folder in old_file.meta.folders:
-                        if folder in self.folder_id_map and old_file.meta.fullname in self.folder_id_map[folder].files:
-                            self.folder_id_map[folder].files.pop(old_file.meta.fullname)
-                # 更新文件映射
-                new_file = self.src.image(k)
-                if new_file.meta.isDeleted:
-                    continue
-                self.file_id_map[k] = new_file
-                for folder in new_file.meta.folders:
-                    self.folder_id_map[folder].add_file(new_file)
-        self._last_check_time = now()
+        每次写回都会编码整棵文件夹树，连续创建、移动文件夹时只写一次。
+        """
+        if self._meta_timer is not None:
+            self._meta_timer.cancel()
+        self._meta_timer = threading.Timer(META_FLUSH_DELAY, self.flush)
+        self._meta_timer.daemon = True
+        self._meta_timer.start()
+
+    @_synchronized
+    def flush(self) -> None:
+        """立即写回所有延迟的修改。"""
+        if self._meta_timer is not None:
+            self._meta_timer.cancel()
+            self._meta_timer = None
+            try:
+                self.src.save_meta()
+                # 自己写入的修改不需要在 update_cache 中重新解析
+                self._meta_stamp = self._stamp(self.src.path / "metadata.json")
+            except OSError as e:
+                logging.warning("写入 metadata.json 失败 %s: %s", self.src.path, e)
+        MtimeWriter.of(self.src.path).flush()
 
     # ==================== 文件操作方法 ====================
 
-    def new_file(self, path: "Path", data: bytes) -> bool:
+    def _folder_at(self, path: "VPath") -> FolderSource | None:
+        """按路径查找文件夹，路径不存在或指向文件时返回 None。"""
+        _id = self.path_to_id.get(path)
+        return None if _id is None else self.folder_id_map.get(_id)
+
+    @_synchronized
+    def list_folder(
+        self, folder: FolderSource
+    ) -> tuple[tuple[tuple[str, ImageSource], ...], tuple[tuple[str, FolderSource], ...]]:
+        """在锁内复制文件夹的直接子项。
+
+        请求线程与修改方法并发执行，直接遍历 files / subfolders 可能在迭代中途遇到字典大小变化，
+        调用方应遍历这里返回的副本。
+
+        Returns:
+            (素材名称, 素材) 与 (子文件夹名称, 子文件夹) 两组条目。
+        """
+        return tuple(folder.files.items()), tuple(folder.subfolders.items())
+
+    @_mutation
+    def new_file(self, path: "VPath", data: bytes) -> ImageSource | None:
+        """新建素材，返回新素材以便调用方直接使用而无需再次查找，失败时返回 None。"""
         if path in self.path_to_id:
-            return False
-        folder = path.parent
-        if folder not in self.path_to_id:
-            return False
-        if (image := self.folder_id_map[self.path_to_id[folder]].new_file(data, path.stem, path.suffix.lstrip("."))) is None:
-            return False
+            return None
+        parent, name = split_path(path)
+        if (folder := self._folder_at(parent)) is None:
+            return None
+        stem, ext = split_name(name)
+        if (image := folder.new_file(data, stem, ext)) is None:
+            return None
         self.file_id_map[image.meta.id] = image
         self.path_to_id[path] = image.meta.id
-        return True
+        return image
 
-    def write_file(self, path: "Path", data: bytes):
+    @_mutation
+    def write_file(self, path: "VPath", data: bytes):
         if (_id := self.path_to_id.get(path)) is None:
             return False
         file = self.file_id_map[_id]
-        file.meta.size = len(data)
+        # 取一次时间，save_data 同时写入 size 与 modificationTime
         time = now()
-        file.meta.mtime = time
-        file.meta.modificationTime = time
-        file.meta.lastModified = time
-        file.save_data(data)
+        file.meta.mtime = file.meta.lastModified = time
+        if file.is_image:
+            # 客户端常先上传空文件再覆盖写入真实内容，尺寸需随内容更新
+            file.meta.width, file.meta.height = image_size(data)
+        file.save_data(data, time)
         return True
 
-    def new_folder(self, path: "Path") -> bool:
-        parent, name = path.parent, path.name
-        if parent not in self.path_to_id:
-            return False
-        parent_id = self.path_to_id[parent]
-        parent_folder = self.folder_id_map[parent_id]
-        if not (subfolder := parent_folder.new_subfolder(name)):
-            return False
+    @_mutation
+    def new_folder(self, path: "VPath") -> FolderSource | None:
+        """新建文件夹，返回新文件夹，失败时返回 None。"""
+        parent, name = split_path(path)
+        if (parent_folder := self._folder_at(parent)) is None:
+            return None
+        if (subfolder := parent_folder.new_subfolder(name)) is None:
+            return None
         self.folder_id_map[subfolder.meta.id] = subfolder
         self.path_to_id[path] = subfolder.meta.id
-        if parent_id == ROOT_ID:
+        if parent_folder.meta.id == ROOT_ID:
             self.src.meta.folders.append(subfolder.meta)
-        self.src.save_meta()
-        return True
+        self._save_meta()
+        return subfolder
 
-    def delete_node(self, path: "Path") -> bool:
+    @_mutation
+    def delete_node(self, path: "VPath") -> bool:
         """删除素材"""
-        if path not in self.path_to_id:
+        # 每一步都只做一次字典探测：pop/get 的结果同时用作存在性判断
+        if (_id := self.path_to_id.pop(path, None)) is None:
             return False
-        _id = self.path_to_id.pop(path)
-        if _id in self.file_id_map:
-            image = self.file_id_map.pop(_id)
-            image.delete()
-            parent, name = path.parent, path.name
+        if (image := self.file_id_map.get(_id)) is not None:
+            parent, name = split_path(path)
             folder = self.folder_id_map[self.path_to_id[parent]]
             folder.files.pop(name)
+            self._unlink_image(folder, path, image)
             return True
-        if _id in self.folder_id_map:
-            subfolder = self.folder_id_map.pop(_id)
-
-            def clear_images(folder: FolderSource):
-                for image in folder.files.values():
-                    target = folder.target / image.meta.fullname
-                    image.meta.folders.remove(folder.meta.id)
-                    image.targets.remove(target)
-                    self.path_to_id.pop(target)
-                    if not image.meta.folders:
-                        self.file_id_map.pop(image.meta.id)
-                        image.delete()
-                    else:
-                        image.save_meta()
-
-                for subfolder in folder.subfolders.values():
-                    clear_images(subfolder)
-
-            clear_images(subfolder)
-            parent, name = path.parent, path.name
+        if (subfolder := self.folder_id_map.pop(_id, None)) is not None:
+            # 显式栈遍历整棵子树，避免深层目录的递归开销
+            stack = [subfolder]
+            while stack:
+                folder = stack.pop()
+                if folder is not subfolder:
+                    # 子文件夹的映射通过自身 target 直接定位，无需扫描 path_to_id
+                    self.folder_id_map.pop(folder.meta.id, None)
+                    self.path_to_id.pop(folder.target, None)
+                for name, image in folder.files.items():
+                    target = join_path(folder.target, name)
+                    self.path_to_id.pop(target, None)
+                    self._unlink_image(folder, target, image)
+                stack.extend(folder.subfolders.values())
+
+            parent, name = split_path(path)
             folder = self.folder_id_map[self.path_to_id[parent]]
             folder.subfolders.pop(name)
-            self.src.save_meta()
+            self._detach_folder(folder, subfolder)
+            self._save_meta()
             return True
         return False
 
-    def _repath_folder(self, folder: "FolderSource", new_target: "Path") -> None:
-        """递归更新文件夹及其所有子项在 path_to_id 和 targets 中的路径（原地修改）。"""
-        old_target = folder.target
-
-        # 更新本文件夹下所有文件的路径
-        for image in folder.files.values():
-            old_t = old_target / image.meta.fullname
-            new_t = new_target / image.meta.fullname
-            image.targets.discard(old_t)
-            image.targets.add(new_t)
-            self.path_to_id.pop(old_t, None)
-            self.path_to_id[new_t] = image.meta.id
-
-        # 原地更新文件夹自身的 target（old_target 可能已被调用方提前移除）
-        self.path_to_id.pop(old_target, None)
-        folder.target = new_target
-        self.path_to_id[new_target] = folder.meta.id
-
-        # 递归处理子文件夹
-        for child_name, child_folder in folder.subfolders.items():
-            self._repath_folder(child_folder, new_target / child_name)
-
-    def rename_node(self, old_path: "Path", new_path: "Path") -> bool:
+    def _unlink_image(self, folder: "FolderSource", target: "VPath", image: ImageSource) -> None:
+        """把素材从一个文件夹中移出，素材不再出现在任何路径下时才整体删除。
+
+        以 targets 判断剩余位置：未分类和不存在的文件夹不在 meta.folders 中，
+        按 meta.folders 判断会误删或在移除时出错。
+        """
+        if folder.meta.id in image.meta.folders:
+            image.meta.folders.remove(folder.meta.id)
+        image.targets.discard(target)
+        if image.targets:
+            image.save_meta()
+        else:
+            self.file_id_map.pop(image.meta.id, None)
+            image.delete()
+
+    def _detach_folder(self, parent: "FolderSource", folder: "FolderSource") -> None:
+        """从父文件夹的元数据中移除子文件夹，只需扫描父文件夹自身的 children。"""
+        folder_id = folder.meta.id
+        parent.meta.children = [c for c in parent.meta.children if c.id != folder_id]
+        if parent.meta.id == ROOT_ID:
+            self.src.meta.folders = [c for c in self.src.meta.folders if c.id != folder_id]
+
+    def _attach_folder(self, parent: "FolderSource", folder: "FolderSource") -> None:
+        """把子文件夹加入父文件夹的元数据。"""
+        parent.meta.children.append(folder.meta)
+        if parent.meta.id == ROOT_ID:
+            self.src.meta.folders.append(folder.meta)
+
+    def _repath_folder(self, folder: "FolderSource", new_target: "VPath") -> None:
+        """更新文件夹及其所有子项在 path_to_id 和 targets 中的路径（原地修改）。
+
+        使用显式栈代替递归，避免深层目录的栈帧开销与递归深度限制。
+        """
+        stack = [(folder, new_target)]
+        while stack:
+            folder, new_target = stack.pop()
+            old_target = folder.target
+
+            # 更新本文件夹下所有文件的路径
+            for name, image in folder.files.items():
+                # files 的键就是 fullname，无需再次格式化
+                old_t = join_path(old_target, name)
+                new_t = join_path(new_target, name)
+                image.targets.discard(old_t)
+                image.targets.add(new_t)
+                self.path_to_id.pop(old_t, None)
+                self.path_to_id[new_t] = image.meta.id
+
+            # 原地更新文件夹自身的 target（old_target 可能已被调用方提前移除）
+            self.path_to_id.pop(old_target, None)
+            folder.target = new_target
+            self.path_to_id[new_target] = folder.meta.id
+
+            stack.extend(
+                (child_folder, join_path(new_target, child_name))
+                for child_name, child_folder in folder.subfolders.items()
+            )
+
+    @_mutation
+    def rename_node(self, old_path: "VPath", new_path: "VPath") -> bool:
         """重命名或移动素材。"""
-        if old_path not in self.path_to_id or new_path in self.path_to_id:
+        if (file_id := self.path_to_id.get(old_path)) is None or new_path in self.path_to_id:
             return False
-        old_parent = old_path.parent
-        new_parent = new_path.parent
-        if new_parent not in self.path_to_id:
+        old_parent, old_name = split_path(old_path)
+        new_parent, new_name = split_path(new_path)
+        if (_new_parent := self._folder_at(new_parent)) is None:
             return False
-
-        file_id = self.path_to_id.pop(old_path)
-        self.path_to_id[new_path] = file_id
-        _old_parent = self.folder_id_map[self.path_to_id[old_parent]]
-        _new_parent = self.folder_id_map[self.path_to_id[new_parent]]
-        if file_id in self.file_id_map:
-            image = self.file_id_map[file_id]
-            image.meta.name = new_path.stem
-            image.meta.ext = new_path.suffix.lstrip(".")
-            image.save_meta()
+        # 同一文件夹内改名（编辑器保存时的常见模式）直接复用已查到的父文件夹
+        if old_parent == new_parent:
+            _old_parent = _new_parent
+        else:
+            _old_parent = self.folder_id_map[self.path_to_id[old_parent]]
+
+        if (image := self.file_id_map.get(file_id)) is not None:
+            # 先移动磁盘上的数据文件，失败时映射、targets 和元数据都保持原样
+            try:
+                image.rename(*split_name(new_name))
+            except OSError as e:
+                logging.warning("重命名素材失败 %s -> %s: %s", old_path, new_path, e)
+                return False
+            del self.path_to_id[old_path]
+            self.path_to_id[new_path] = file_id
             image.targets.remove(old_path)
             image.targets.add(new_path)
-            _old_parent.files.pop(old_path.name)
-            _new_parent.files[image.meta.fullname] = image
+            _old_parent.files.pop(old_name)
+            _new_parent.files[new_name] = image
             return True
 
-        if file_id in self.folder_id_map:
-            folder = self.folder_id_map[file_id]
-            folder.meta.name = new_path.name
-            _old_parent.subfolders.pop(old_path.name)
+        if (folder := self.folder_id_map.get(file_id)) is not None:
+            folder.meta.name = new_name
+            _old_parent.subfolders.pop(old_name)
+            if _old_parent is not _new_parent:
+                self._detach_folder(_old_parent, folder)
+                self._attach_folder(_new_parent, folder)
             self._repath_folder(folder, new_path)
             _new_parent.subfolders[folder.meta.fullname] = folder
-            self.src.save_meta()
+            self._save_meta()
             return True
 
         return False
@@ -26,3 +26,15 @@ Examples:
     - "游戏编程模式" - PDF 文件的主干名
     - "ブルーアーカイブ オフィシャルアートワークス" - 图片文件的主干名
 """
+
+type VPath = str
+"""素材库内的虚拟路径。
+
+以 "/" 分隔、不含首尾斜杠的相对路径，根目录为空字符串。
+用作路径索引的键，避免在每次查找时构造和哈希 ``Path`` 对象。
+
+Examples:
+    - "" - 根目录
+    - "未分类/image.png" - 未分类中的素材
+    - "设计素材/图标" - 嵌套文件夹
+"""